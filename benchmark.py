@@ -1,5 +1,9 @@
+import gc
+import sys
+import time
 import timeit
 import secrets
+import tracemalloc
 from mlkem import ML_KEM
 from memory_profiler import memory_usage
 
@@ -12,6 +16,67 @@ def measure_memory(func, *args):
     mem_usage, result = memory_usage((func, args), retval=True, max_usage=True)
     return result, mem_usage
 
+def measure_gc(func, runs):
+    """
+    Helper to run a function `runs` times while recording garbage collector activity.
+    Returns (gen0 collections, total GC pause in s, longest GC pause in s).
+    """
+    pauses = []
+    started = [0.0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            started[0] = time.perf_counter()
+        else:
+            pauses.append(time.perf_counter() - started[0])
+
+    gc.collect()
+    before = gc.get_stats()[0]['collections']
+    gc.callbacks.append(on_gc)
+    try:
+        for _ in range(runs):
+            func()
+    finally:
+        gc.callbacks.remove(on_gc)
+    collections = gc.get_stats()[0]['collections'] - before
+    return collections, sum(pauses), max(pauses, default=0.0)
+
+def measure_allocations(func):
+    """Helper to measure peak memory allocated by Python during one call, in KiB."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+def measure_blocks(func):
+    """
+    Helper to count memory blocks allocated during one call.
+    sys.getallocatedblocks() is sampled on every call/return event; the sum of
+    its increases between events is a lower bound on the number of allocations
+    (blocks allocated and freed between two events are not seen). Returns
+    (blocks allocated, peak live blocks above the starting count).
+    """
+    gc.collect()
+    base = sys.getallocatedblocks()
+    state = {'last': base, 'peak': base, 'allocated': 0}
+
+    def on_event(frame, event, arg):
+        n = sys.getallocatedblocks()
+        if n > state['last']:
+            state['allocated'] += n - state['last']
+        state['last'] = n
+        state['peak'] = max(state['peak'], n)
+
+    sys.setprofile(on_event)
+    try:
+        func()
+    finally:
+        sys.setprofile(None)
+    return state['allocated'], state['peak'] - base
+
 def benchmark_pke(kem, runs=100):
     print("\n[Benchmarking PKE Functions]")
     d = secrets.token_bytes(32)
@@ -67,12 +132,35 @@ def benchmark_kem(kem, runs=100):
     _, mem_decaps = measure_memory(kem.decaps_internal, dk, c)
     print(f"Max memory Decaps (KEM): {mem_decaps:.2f} MB")
 
+def benchmark_workspace(param='ML-KEM-512', runs=100):
+    print("\n[Benchmarking In-place Workspace vs List-based Encaps/Decaps]")
+    d = secrets.token_bytes(32)
+    z = secrets.token_bytes(32)
+    m = secrets.token_bytes(32)
+
+    for use_workspace in (False, True):
+        kem = ML_KEM(param, use_workspace)
+        label = "workspace" if use_workspace else "lists"
+        ek, dk = kem.keygen_internal(d, z)
+        _, c = kem.encaps_internal(ek, m)   # Also allocates this thread's workspace
+
+        for name, func in (("Encaps", lambda: kem.encaps_internal(ek, m)),
+                           ("Decaps", lambda: kem.decaps_internal(dk, c))):
+            t = timeit.timeit(func, number=runs)
+            peak = measure_allocations(func)
+            allocated, live = measure_blocks(func)
+            collections, pause, longest = measure_gc(func, runs)
+            print(f"{name} ({label}): {t / runs:.6f} s, peak alloc {peak:.1f} KiB, "
+                  f"blocks allocated >= {allocated} (peak live +{live}), "
+                  f"gen0 GCs {collections}, GC pause total {pause * 1e3:.3f} ms / max {longest * 1e3:.3f} ms")
+
 def run_all_benchmarks(param='ML-KEM-512', runs=100):
     print(f"Running benchmarks for parameter set: {param} ({runs} runs)")
     kem = ML_KEM(param)
 
     benchmark_pke(kem, runs)
     benchmark_kem(kem, runs)
+    benchmark_workspace(param, runs)
 
 if __name__ == "__main__":
     run_all_benchmarks(param='ML-KEM-512', runs=100)
\ No newline at end of file
@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import psutil
+
+from mlkem import ML_KEM, ML_KEM_PARAM
+
+OPS = ("keygen", "encaps", "decaps")
+
+def parse_mix(mix):
+    """
+    Parse an operation mix such as "keygen=1,encaps=4,decaps=4" into (ops, weights).
+    A bare operation name counts with weight 1.
+    """
+    ops, weights = [], []
+    for part in mix.split(","):
+        op, _, w = part.strip().partition("=")
+        if op not in OPS:
+            raise ValueError(f"unknown operation in mix: {op}")
+        ops.append(op)
+        weights.append(float(w) if w else 1.0)
+    return ops, weights
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100 * len(sorted_values) - 1e-9)  # Slack for float error, e.g. 99.9% of 1000
+    i = max(0, min(len(sorted_values) - 1, rank - 1))
+    return sorted_values[i]
+
+def missed_requests(due, end, rate):
+    """Number of paced requests scheduled in [due, end) that were never started."""
+    if not rate or due >= end:
+        return 0
+    return math.ceil((end - due) * rate)
+
+class Workload:
+    """One worker's ML-KEM context plus a fixed key pair and ciphertext to run the mix against."""
+
+    def __init__(self, param):
+        self.kem = ML_KEM(param)
+        self.ek, self.dk = self.kem.keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32))
+        _, self.c = self.kem.encaps_internal(self.ek, secrets.token_bytes(32))
+
+    def run(self, op):
+        if op == "keygen":
+            self.kem.keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32))
+        elif op == "encaps":
+            self.kem.encaps_internal(self.ek, secrets.token_bytes(32))
+        else:
+            self.kem.decaps_internal(self.dk, self.c)
+
+def worker(param, mix, duration, rate, seed):
+    """
+    Run the operation mix for `duration` seconds and return (samples, missed), where
+    samples is a list of (op, latency) pairs.
+
+    With a `rate` (operations per second for this worker) requests are issued on a
+    fixed schedule and latency is measured from the scheduled start, so a worker
+    falling behind shows up as queueing delay. The run still stops at `duration`;
+    requests scheduled before then but never started are counted as missed.
+    Without a rate it runs flat out.
+    """
+    ops, weights = parse_mix(mix)
+    rng = random.Random(seed)
+    load = Workload(param)
+    samples = []
+    start = time.perf_counter()
+    end = start + duration
+    due = start
+    while True:
+        now = time.perf_counter()
+        if now >= end or (rate and due >= end):
+            break
+        if rate:
+            if due > now:
+                time.sleep(due - now)
+            t0 = due
+            due += 1.0 / rate
+        else:
+            t0 = now
+        op = rng.choices(ops, weights)[0]
+        load.run(op)
+        samples.append((op, time.perf_counter() - t0))
+    return samples, missed_requests(due, end, rate)
+
+async def async_worker(param, mix, duration, rate, seed):
+    """Asyncio version of `worker`; operations run on the event loop between paced sleeps."""
+    ops, weights = parse_mix(mix)
+    rng = random.Random(seed)
+    load = Workload(param)
+    samples = []
+    start = time.perf_counter()
+    end = start + duration
+    due = start
+    while True:
+        if rate:
+            now = time.perf_counter()
+            if due > now:
+                await asyncio.sleep(due - now)
+        else:
+            await asyncio.sleep(0)  # Let the other tasks run
+        now = time.perf_counter()
+        if now >= end or (rate and due >= end):
+            break
+        if rate:
+            t0 = due
+            due += 1.0 / rate
+        else:
+            t0 = now
+        op = rng.choices(ops, weights)[0]
+        load.run(op)
+        samples.append((op, time.perf_counter() - t0))
+    return samples, missed_requests(due, end, rate)
+
+class ResourceSampler(threading.Thread):
+    """Background thread sampling RSS and CPU utilization of this process and its children."""
+
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.proc = psutil.Process()
+        self.samples = []  # (elapsed s, RSS MB, CPU %)
+        self.stop_event = threading.Event()
+
+    def tree(self):
+        procs = [self.proc]
+        try:
+            procs += self.proc.children(recursive=True)
+        except psutil.Error:
+            pass
+        return procs
+
+    def measure(self):
+        rss, cpu = 0, 0.0
+        for p in self.tree():
+            try:
+                rss += p.memory_info().rss
+                t = p.cpu_times()
+                cpu += t.user + t.system
+            except psutil.Error:
+                pass  # Process exited between listing and sampling
+        return rss, cpu
+
+    def run(self):
+        start = time.perf_counter()
+        last_t, last_cpu = start, self.measure()[1]
+        while not self.stop_event.wait(self.interval):
+            now = time.perf_counter()
+            rss, cpu = self.measure()
+            # Utilization of the whole host: 100% means every core busy
+            util = 100.0 * max(0.0, cpu - last_cpu) / (now - last_t) / psutil.cpu_count()
+            self.samples.append((now - start, rss / 2**20, util))
+            last_t, last_cpu = now, cpu
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+def run_load(param="ML-KEM-768", mix="keygen=1,encaps=4,decaps=4", mode="threads",
+             workers=1, duration=10.0, rate=None, interval=0.5):
+    """
+    Drive the operation mix with `workers` threads, processes or asyncio tasks.
+    `rate` is the total target rate in operations per second (None = as fast as possible).
+    Returns a report dict.
+    """
+    if param not in ML_KEM_PARAM:
+        raise ValueError(f"unknown parameter set: {param}")
+    parse_mix(mix)  # Fail early on a bad mix
+    per_worker = rate / workers if rate else None
+    args = [(param, mix, duration, per_worker, i) for i in range(workers)]
+
+    sampler = ResourceSampler(interval)
+    sampler.start()
+    start = time.perf_counter()
+    if mode == "threads":
+        with ThreadPoolExecutor(workers) as ex:
+            results = list(ex.map(lambda a: worker(*a), args))
+    elif mode == "processes":
+        with ProcessPoolExecutor(workers) as ex:
+            results = list(ex.map(worker, *zip(*args)))
+    elif mode == "asyncio":
+        async def main():
+            return await asyncio.gather(*(async_worker(*a) for a in args))
+        results = asyncio.run(main())
+    else:
+        raise ValueError(f"unknown mode: {mode}")
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    samples = [s for (r, _) in results for s in r]
+    report = {
+        "param": param, "mix": mix, "mode": mode, "workers": workers,
+        "target_rate": rate, "duration": elapsed,
+        "missed": sum(missed for (_, missed) in results),
+        "ops": {},
+        "resources": sampler.samples,
+    }
+    for op in ("all",) + OPS:
+        lat = sorted(t for (o, t) in samples if op == "all" or o == op)
+        if not lat:
+            continue
+        report["ops"][op] = {
+            "count": len(lat),
+            "throughput": len(lat) / elapsed,
+            "p50": percentile(lat, 50),
+            "p99": percentile(lat, 99),
+            "p999": percentile(lat, 99.9),
+            "max": lat[-1],
+        }
+    return report
+
+def print_report(report):
+    rate = f"{report['target_rate']:.1f} ops/s" if report["target_rate"] else "max"
+    print(f"Load test: {report['param']}, mix {report['mix']}, "
+          f"{report['workers']} {report['mode']}, rate {rate}, {report['duration']:.2f} s")
+    if report["target_rate"]:
+        print(f"Missed requests (scheduled but never started): {report['missed']}")
+    print(f"{'op':8} {'count':>8} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'p999 ms':>10} {'max ms':>10}")
+    for op, s in report["ops"].items():
+        print(f"{op:8} {s['count']:8d} {s['throughput']:10.2f} {s['p50']*1e3:10.3f} "
+              f"{s['p99']*1e3:10.3f} {s['p999']*1e3:10.3f} {s['max']*1e3:10.3f}")
+    res = report["resources"]
+    if res:
+        print(f"\n{'t s':>8} {'RSS MB':>10} {'CPU %':>8}")
+        for (t, rss, cpu) in res:
+            print(f"{t:8.2f} {rss:10.2f} {cpu:8.1f}")
+        print(f"Peak RSS: {max(r for (_, r, _) in res):.2f} MB  "
+              f"Mean CPU: {sum(c for (_, _, c) in res) / len(res):.1f} %")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sustained-throughput and tail-latency load generator for ML-KEM.")
+    parser.add_argument("--param", default="ML-KEM-768", choices=sorted(ML_KEM_PARAM))
+    parser.add_argument("--mix", default="keygen=1,encaps=4,decaps=4",
+                        help="weighted operation mix, e.g. encaps=1,decaps=1")
+    parser.add_argument("--mode", default="threads", choices=("threads", "processes", "asyncio"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="total target ops/s across all workers (default: as fast as possible)")
+    parser.add_argument("--interval", type=float, default=0.5, help="resource sampling interval in seconds")
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_load(args.param, args.mix, args.mode, args.workers,
+                          args.duration, args.rate, args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import threading
+
 from test_mlkem import test_mlkem
 
 from Crypto.Hash import SHAKE128, SHAKE256, SHA3_256, SHA3_512
@@ -5,7 +7,10 @@ from Crypto.Hash import SHAKE128, SHAKE256, SHA3_256, SHA3_512
 from polynomials import (
     ML_KEM_ZETA_NTT, ML_KEM_ZETA_MUL, byte_decode, byte_encode,
     sample_ntt, sample_poly_cbd, ntt, ntt_inverse,
-    multiply_ntts, base_case_multiply, poly_add, poly_sub
+    multiply_ntts, base_case_multiply, poly_add, poly_sub,
+    packed_modulus_violations, byte_decode_into, sample_ntt_into,
+    sample_poly_cbd_into, ntt_inplace, ntt_inverse_inplace,
+    multiply_ntts_into, multiply_ntts_add, poly_add_inplace, poly_sub_inplace
 )
 
 # Table 2. Approved parameter sets for ML-KEM
@@ -15,38 +20,102 @@ ML_KEM_PARAM = {
     "ML-KEM-1024": (4, 2, 2, 11, 5)
 }
 
+class Workspace:
+    """Preallocated polynomials and byte buffers for one thread's encaps/decaps."""
+
+    def __init__(self, k, ct_len):
+        poly = lambda: [0] * 256
+        self.ct_len = ct_len
+        self.t = [poly() for _ in range(k)]                     # Decoded public key t
+        self.a = [[poly() for _ in range(k)] for _ in range(k)] # A^T
+        self.s = [poly() for _ in range(k)]                     # Decoded secret key s
+        self.y = [poly() for _ in range(k)]
+        self.e1 = [poly() for _ in range(k)]
+        self.u = [poly() for _ in range(k)]
+        self.e2 = poly()
+        self.v = poly()
+        self.w = poly()
+        self.mu = poly()
+        self.bits = bytearray(256 * 12)  # Bit scratch for the codecs and CBD sampling
+        self.seed = bytearray(34)        # rho || j || i
+        self.m = bytearray(32)           # Decrypted message
+        self.ct = bytearray(ct_len)      # Re-encrypted ciphertext
+
 class ML_KEM:
     """
     This class implements the ML-KEM (Module Lattice-based Key Encapsulation Mechanism) system,
     including Key Generation, Encryption, and Decryption as described in the NIST FIPS 203 standard.
     """
 
-    def __init__(self, param='ML-KEM-1024'):
-        """Initialize the ML-KEM instance using a specific parameter set."""
+    def __init__(self, param='ML-KEM-1024', use_workspace=True):
+        """
+        Initialize the ML-KEM instance using a specific parameter set.
+        With `use_workspace`, encryption and decryption run in place on
+        per-thread preallocated buffers instead of building new lists.
+        Threads may share an instance only if none of them switches the
+        parameter set via `param=`, which re-runs this method for all of them.
+        """
         if param not in ML_KEM_PARAM:
             raise ValueError
         self.q = 3329                 # Modulus used for all arithmetic
         self.n = 256                 # Polynomial degree
         (self.k, self.eta1, self.eta2, self.du, self.dv) = ML_KEM_PARAM[param]  # Load parameters
+        self.ek_len = 384 * self.k + 32                 # Encapsulation key size in bytes
+        self.dk_len = 768 * self.k + 96                 # Decapsulation key size in bytes
+        self.ct_len = 32 * (self.du * self.k + self.dv) # Ciphertext size in bytes
+        self.use_workspace = use_workspace
+        if not hasattr(self, 'local'):
+            self.local = threading.local()  # Per-thread workspaces, kept across parameter switches
+
+    def workspace(self):
+        """Return this thread's workspace, allocating it on first use or after a parameter switch."""
+        ws = getattr(self.local, 'ws', None)
+        if ws is None or ws.ct_len != self.ct_len:
+            ws = self.local.ws = Workspace(self.k, self.ct_len)
+        return ws
+
+    # === Buffer Handling ===
+
+    def byte_view(self, x):
+        """
+        Return a flat byte memoryview over `x` without copying it.
+        Accepts any buffer: bytes, bytearray, memoryview, mmap, array, ...
+        """
+        return memoryview(x).cast('B')
+
+    def out_view(self, out, size):
+        """Return a writable byte view over a caller-supplied output buffer of exactly `size` bytes."""
+        out = self.byte_view(out)
+        if out.readonly or len(out) != size:
+            raise ValueError(f"output buffer must be writable and {size} bytes long")
+        return out
 
     # === 4.1 Cryptographic Hash Functions ===
 
     def h(self, x):
         """Hash function H using SHA3-256."""
-        return SHA3_256.new(x).digest()
-
-    def g(self, x):
-        """Hash function G using SHA3-512, output split into two halves."""
-        h = SHA3_512.new(x).digest()
+        return SHA3_256.new(self.byte_view(x)).digest()
+
+    def g(self, *x):
+        """Hash function G using SHA3-512 over the concatenation of `x`, output split into two halves."""
+        h = SHA3_512.new()
+        for b in x:
+            h.update(self.byte_view(b))  # Absorb each part instead of concatenating
+        h = h.digest()
         return (h[0:32], h[32:64])
 
-    def j(self, s):
-        """Hash function J using SHAKE256 to produce 32 bytes of output."""
-        return SHAKE256.new(s).read(32)
+    def j(self, *s):
+        """Hash function J using SHAKE256 over the concatenation of `s` to produce 32 bytes of output."""
+        xof = SHAKE256.new()
+        for b in s:
+            xof.update(self.byte_view(b))
+        return xof.read(32)
 
     def prf(self, eta, s, b):
         """Pseudo-random function used to sample noise polynomials."""
-        return SHAKE256.new(s + bytes([b])).read(64 * eta)
+        xof = SHAKE256.new(s)
+        xof.update(bytes([b]))
+        return xof.read(64 * eta)
 
     # === 4.2.1 Conversion and Compression Algorithms ===
 
@@ -58,6 +127,18 @@ class ML_KEM:
         """Decompress a polynomial from d-bit representation back to full precision."""
         return [(self.q * y + (1 << (d - 1))) >> d for y in yv]
 
+    def compress_inplace(self, d, xv):
+        """In-place `compress`."""
+        for i in range(256):
+            xv[i] = ((xv[i] << d) + (self.q - 1) // 2) // self.q % (1 << d)
+        return xv
+
+    def decompress_inplace(self, d, yv):
+        """In-place `decompress`."""
+        for i in range(256):
+            yv[i] = (self.q * yv[i] + (1 << (d - 1))) >> d
+        return yv
+
     # === Helper Functions ===
 
     def sample_poly_vector(self, length, eta, seed, counter_start):
@@ -68,12 +149,29 @@ class ML_KEM:
             vec.append(sample_poly_cbd(eta, prf_output, self.q))  # Convert bytes to polynomial
         return vec
 
-    def generate_matrix_from_seed(self, rho, transpose=False):
+    def generate_matrix_from_seed(self, rho, transpose=False, out=None, seed=None):
         """
         Generate a matrix A (or its transpose A^T) deterministically from a seed `rho`.
         Each element A[i][j] is a polynomial sampled with NTT-compatible structure.
+        If `out` is given, the k x k polynomials of `out` are overwritten in place,
+        using the 34-byte `seed` buffer as scratch.
         """
-        A_data = [[sample_ntt(rho + bytes([j, i]), self.q) for j in range(self.k)] for i in range(self.k)]
+        seed = seed if seed is not None else bytearray(34)  # rho || j || i, reused for every matrix entry
+        seed[0:32] = rho
+        if out is not None:
+            for i in range(self.k):
+                for j in range(self.k):
+                    (seed[32], seed[33]) = (i, j) if transpose else (j, i)
+                    sample_ntt_into(seed, self.q, out[i][j])
+            return out
+        A_data = []
+        for i in range(self.k):
+            row = []
+            for j in range(self.k):
+                seed[32] = j
+                seed[33] = i
+                row.append(sample_ntt(seed, self.q))
+            A_data.append(row)
         if transpose:
             A_data = [list(row) for row in zip(*A_data)]  # Transpose the matrix
         return A_data
@@ -109,7 +207,7 @@ class ML_KEM:
         It generates a random matrix A from a seed, and secret vectors s and e.
         Outputs public and private keys as encoded byte strings.
         """
-        (rho, sig) = self.g(d + bytes([self.k]))
+        (rho, sig) = self.g(d, bytes([self.k]))
 
         a = self.generate_matrix_from_seed(rho)  # Generate matrix A deterministically
 
@@ -122,9 +220,19 @@ class ML_KEM:
         t = self.poly_mat_vec_mul_or_dot(a, s)  # t = A * s
         t = [poly_add(t[i], e[i], self.q) for i in range(self.k)]  # t = A * s + e
 
-        ek_pke = byte_encode(12, t, self.q) + rho  # Public key encoding
-        dk_pke = byte_encode(12, s, self.q)        # Secret key encoding
-        return (ek_pke, dk_pke)
+        ek_pke = bytearray(self.ek_len)
+        byte_encode(12, t, self.q, ek_pke)  # Public key encoding
+        ek_pke[384*self.k:] = rho
+        dk_pke = byte_encode(12, s, self.q)  # Secret key encoding
+        return (bytes(ek_pke), bytes(dk_pke))
+
+    def expand_ek(self, ek_pke):
+        """Decode t and generate A^T from a public key: the key-dependent part of K-PKE.Encrypt."""
+        ek_pke = self.byte_view(ek_pke)
+        t = [byte_decode(12, ek_pke[384*i:384*(i+1)], self.q) for i in range(self.k)]  # Extract t
+        rho = ek_pke[384*self.k : 384*self.k + 32]  # Extract rho
+        a = self.generate_matrix_from_seed(rho, transpose=True)  # Generate A^T
+        return (t, a)
 
     #   Algorithm 14, K-PKE.Encrypt(ek_PKE, m, r)
     def k_pke_encrypt(self, ek_pke, m, r):
@@ -132,11 +240,25 @@ class ML_KEM:
         PKE encryption algorithm: encrypts message `m` under public key `ek_pke`
         using randomness `r`. Outputs ciphertext.
         """
-        n = 0
-        t = [byte_decode(12, ek_pke[384*i:384*(i+1)], self.q) for i in range(self.k)]  # Extract t
-        rho = ek_pke[384*self.k : 384*self.k + 32]  # Extract rho
+        c = bytearray(self.ct_len)
+        self.k_pke_encrypt_into(ek_pke, m, r, c)
+        return bytes(c)
 
-        a = self.generate_matrix_from_seed(rho, transpose=True)  # Generate A^T
+    def k_pke_encrypt_into(self, ek_pke, m, r, out, expanded=None):
+        """
+        Same as `k_pke_encrypt`, but writes the ciphertext into the caller-supplied
+        buffer `out` (exactly `ct_len` bytes). Inputs may be any buffer and are
+        parsed through memoryviews without copying. `expanded` may hold the
+        `expand_ek(ek_pke)` result to skip decoding t and regenerating A^T.
+        """
+        m = self.byte_view(m)
+        out = self.out_view(out, self.ct_len)
+        if len(m) != 32 or (expanded is None and len(self.byte_view(ek_pke)) != self.ek_len):
+            raise ValueError("Invalid message or encryption key length")
+        if self.use_workspace:
+            return self.k_pke_encrypt_inplace(ek_pke, m, r, out, expanded)
+        n = 0
+        (t, a) = expanded if expanded is not None else self.expand_ek(ek_pke)
 
         y = self.sample_poly_vector(self.k, self.eta1, r, n); n += self.k  # Ephemeral secret y
         e1 = self.sample_poly_vector(self.k, self.eta2, r, n); n += self.k # Error vector e1
@@ -157,13 +279,70 @@ class ML_KEM:
         v = poly_add(v, mu, self.q) # Add message
 
         # Encode ciphertext as two components: c1 (from u) and c2 (from v)
-        c1 = b''.join(byte_encode(self.du, self.compress(self.du, u[i]), self.q) for i in range(self.k))
-        c2 = byte_encode(self.dv, self.compress(self.dv, v), self.q)
-        return c1 + c2
+        c1 = out[0 : 32*self.du*self.k]
+        c2 = out[32*self.du*self.k : self.ct_len]
+        byte_encode(self.du, [self.compress(self.du, u[i]) for i in range(self.k)], self.q, c1)
+        byte_encode(self.dv, self.compress(self.dv, v), self.q, c2)
+        return out
+
+    def k_pke_encrypt_inplace(self, ek_pke, m, r, out, expanded=None):
+        """Workspace version of Algorithm 14: every polynomial is reused from this thread's workspace."""
+        ws = self.workspace()
+        (q, k) = (self.q, self.k)
+        if expanded is not None:
+            (t, a) = expanded
+        else:
+            ek_pke = self.byte_view(ek_pke)
+            (t, a) = (ws.t, ws.a)
+            for i in range(k):
+                byte_decode_into(12, ek_pke[384*i:384*(i+1)], q, t[i], ws.bits)  # Extract t
+            self.generate_matrix_from_seed(ek_pke[384*k : 384*k + 32], True, a, ws.seed)  # A^T
+
+        (y, e1, u, v) = (ws.y, ws.e1, ws.u, ws.v)
+        for i in range(k):
+            sample_poly_cbd_into(self.eta1, self.prf(self.eta1, r, i), q, y[i], ws.bits)  # Ephemeral secret y
+            ntt_inplace(y[i], q)
+        for i in range(k):
+            sample_poly_cbd_into(self.eta2, self.prf(self.eta2, r, k + i), q, e1[i], ws.bits)  # Error vector e1
+        sample_poly_cbd_into(self.eta2, self.prf(self.eta2, r, 2*k), q, ws.e2, ws.bits)  # Error poly e2
+
+        for i in range(k):  # u = NTT^-1(A^T * y) + e1
+            multiply_ntts_into(a[i][0], y[0], q, u[i])
+            for j in range(1, k):
+                multiply_ntts_add(a[i][j], y[j], q, u[i])
+            ntt_inverse_inplace(u[i], q)
+            poly_add_inplace(u[i], e1[i], q)
+            self.compress_inplace(self.du, u[i])
+
+        multiply_ntts_into(t[0], y[0], q, v)  # v = NTT^-1(t^T * y) + e2 + mu
+        for i in range(1, k):
+            multiply_ntts_add(t[i], y[i], q, v)
+        ntt_inverse_inplace(v, q)
+        poly_add_inplace(v, ws.e2, q)
+        self.decompress_inplace(1, byte_decode_into(1, m, q, ws.mu, ws.bits))
+        poly_add_inplace(v, ws.mu, q)
+        self.compress_inplace(self.dv, v)
+
+        byte_encode(self.du, u, q, out[0 : 32*self.du*k], ws.bits)
+        byte_encode(self.dv, v, q, out[32*self.du*k : self.ct_len], ws.bits)
+        return out
 
     #   Algorithm 15, K-PKE.Decrypt(dk_PKE, c)
     def k_pke_decrypt(self, dk_pke, c):
         """Decrypt ciphertext `c` using secret key `dk_pke` and return the recovered message."""
+        m = bytearray(32)
+        self.k_pke_decrypt_into(dk_pke, c, m)
+        return m
+
+    def k_pke_decrypt_into(self, dk_pke, c, out):
+        """Same as `k_pke_decrypt`, but writes the 32-byte message into `out`."""
+        out = self.out_view(out, 32)
+        dk_pke = self.byte_view(dk_pke)
+        c = self.byte_view(c)
+        if len(c) != self.ct_len or len(dk_pke) != 384 * self.k:
+            raise ValueError("Invalid ciphertext or decryption key length")
+        if self.use_workspace:
+            return self.k_pke_decrypt_inplace(dk_pke, c, out)
         c1 = c[0 : 32*self.du*self.k]   # Extract u
         c2 = c[32*self.du*self.k : 32*(self.du*self.k + self.dv)]  # Extract v
 
@@ -177,47 +356,114 @@ class ML_KEM:
             w = poly_add(w, multiply_ntts(s[i], ntt(up[i], self.q), self.q), self.q)
 
         w = poly_sub(vp, ntt_inverse(w, self.q), self.q)
-        m = byte_encode(1, self.compress(1, w), self.q)
-        return m
+        return byte_encode(1, self.compress(1, w), self.q, out)
+
+    def k_pke_decrypt_inplace(self, dk_pke, c, out):
+        """Workspace version of Algorithm 15."""
+        ws = self.workspace()
+        (q, k, du) = (self.q, self.k, self.du)
+        (up, vp, s, w) = (ws.u, ws.v, ws.s, ws.w)
+        for i in range(k):
+            byte_decode_into(du, c[32*du*i : 32*du*(i+1)], q, up[i], ws.bits)
+            ntt_inplace(self.decompress_inplace(du, up[i]), q)
+            byte_decode_into(12, dk_pke[384*i:384*(i+1)], q, s[i], ws.bits)
+        byte_decode_into(self.dv, c[32*du*k : self.ct_len], q, vp, ws.bits)
+        self.decompress_inplace(self.dv, vp)
+
+        multiply_ntts_into(s[0], up[0], q, w)  # w = v' - NTT^-1(s^T * NTT(u'))
+        for i in range(1, k):
+            multiply_ntts_add(s[i], up[i], q, w)
+        poly_sub_inplace(vp, ntt_inverse_inplace(w, q), q)
+        return byte_encode(1, self.compress_inplace(1, vp), q, out, ws.bits)
 
     #   Algorithm 16, ML-KEM.KeyGen_internal(d, z)
     def keygen_internal(self, d, z, param=None):
         """ML-KEM key generation: returns encapsulated public and secret keys."""
         if param != None:
-            self.__init__(param)
+            self.__init__(param, self.use_workspace)
+        z = self.byte_view(z)
+        if len(z) != 32:
+            raise ValueError("Invalid z length")
         (ek_pke, dk_pke) = self.k_pke_keygen(d)
         ek = ek_pke
-        dk = dk_pke + ek + self.h(ek) + z  # Construct the secret key with public key hash and z
-        return (ek, dk)
+        dk = bytearray(self.dk_len)  # dk_pke || ek || H(ek) || z
+        dk[0 : 384*self.k] = dk_pke
+        dk[384*self.k : 768*self.k + 32] = ek
+        dk[768*self.k + 32 : 768*self.k + 64] = self.h(ek)
+        dk[768*self.k + 64 :] = z
+        return (ek, bytes(dk))
 
     #   Algorithm 17, ML-KEM.Encaps_internal(ek, m)
     def encaps_internal(self, ek, m, param=None):
         """Encapsulate shared key `m` using public key `ek`. Returns (shared key, ciphertext)."""
         if param != None:
-            self.__init__(param)
-        (k, r) = self.g(m + self.h(ek))  # Derive shared key and randomness
+            self.__init__(param, self.use_workspace)
+        (k, r) = self.g(m, self.h(ek))  # Derive shared key and randomness
         c = self.k_pke_encrypt(ek, m, r)
         return (k, c)
 
+    def encaps_internal_into(self, ek, m, k_out, c_out, param=None):
+        """
+        Same as `encaps_internal`, but writes the shared key into `k_out` (32 bytes)
+        and the ciphertext into `c_out` (`ct_len` bytes), e.g. directly into a send buffer.
+        """
+        if param != None:
+            self.__init__(param, self.use_workspace)
+        k_out = self.out_view(k_out, 32)
+        (k, r) = self.g(m, self.h(ek))
+        self.k_pke_encrypt_into(ek, m, r, c_out)
+        k_out[:] = k
+        return (k_out, c_out)
+
     #   Algorithm 18, ML-KEM.Decaps_internal(dk, c)
     def decaps_internal(self, dk, c, param=None):
         """Decapsulate ciphertext `c` using secret key `dk`. Returns shared key."""
-        if param != None:
-            self.__init__(param)
+        k = bytearray(32)
+        self.decaps_internal_into(dk, c, k, param)
+        return bytes(k)
 
-        # Extract keys and values from concatenated dk
+    def decaps_internal_into(self, dk, c, k_out, param=None):
+        """Same as `decaps_internal`, but writes the shared key into the 32-byte buffer `k_out`."""
+        if param != None:
+            self.__init__(param, self.use_workspace)
+        k_out = self.out_view(k_out, 32)
+        dk = self.byte_view(dk)
+        c = self.byte_view(c)
+        if len(dk) != self.dk_len:
+            raise ValueError("Invalid decapsulation key length")
+
+        # Extract keys and values from concatenated dk (views, no copies)
         dk_pke = dk[0 : 384*self.k]
         ek_pke = dk[384*self.k : 768*self.k + 32]
         h = dk[768*self.k + 32 : 768*self.k + 64]
         z = dk[768*self.k + 64 : 768*self.k + 96]
 
-        mp = self.k_pke_decrypt(dk_pke, c)
-        (kp, rp) = self.g(mp + h)       # Recompute shared key and randomness
-        kk = self.j(z + c)              # Fallback key
-        cp = self.k_pke_encrypt(ek_pke, mp, rp)
+        if self.use_workspace:
+            ws = self.workspace()
+            (mp, cp) = (ws.m, ws.ct)
+        else:
+            (mp, cp) = (bytearray(32), bytearray(self.ct_len))
+        self.k_pke_decrypt_into(dk_pke, c, mp)
+        (kp, rp) = self.g(mp, h)        # Recompute shared key and randomness
+        kk = self.j(z, c)               # Fallback key
+        self.k_pke_encrypt_into(ek_pke, mp, rp, cp)
         if c != cp:
             kp = kk                     # If ciphertext doesn't match, use fallback key
-        return kp
+        k_out[:] = kp
+        return k_out
+
+    #   Section 7.2, encapsulation key check
+    def ek_check(self, ek):
+        """Type check and modulus check of `ek`, done on the packed bytes without decoding."""
+        ek = self.byte_view(ek)
+        return len(ek) == self.ek_len and not packed_modulus_violations(ek[0 : 384*self.k], self.q)
+
+    #   Section 7.3, decapsulation key check
+    def dk_check(self, dk):
+        """Type check and hash check H(ek) of `dk`."""
+        dk = self.byte_view(dk)
+        return (len(dk) == self.dk_len and
+                self.h(dk[384*self.k : 768*self.k + 32]) == dk[768*self.k + 32 : 768*self.k + 64])
 
     #   Algorithm 19
     def keygen(self):
@@ -42,9 +42,10 @@ ML_KEM_ZETA_MUL = [
     2110,   -2110,  2935,   -2935,  885,    -885,   2154,   -2154 ]
 
 #   Algorithm 3, BitsToBytes(b)
-def bits_to_bytes(b):
-    a = bytearray(len(b) // 8)  # Allocate byte array for result
-    for i in range(0, len(b), 8):  # Process every 8 bits
+def bits_to_bytes(b, a=None):
+    if a is None:
+        a = bytearray(len(b) // 8)  # Allocate byte array for result
+    for i in range(0, 8 * len(a), 8):  # Process every 8 bits
         x = 0
         for j in range(8):  # Combine bits into a byte
             x += b[i + j] << j
@@ -52,8 +53,9 @@ def bits_to_bytes(b):
     return a
 
 #   Algorithm 4, BytesToBits(B)
-def bytes_to_bits(b):
-    a = bytearray(8 * len(b))  # Allocate 8 bits per byte
+def bytes_to_bits(b, a=None):
+    if a is None:
+        a = bytearray(8 * len(b))  # Allocate 8 bits per byte
     for i in range(0, 8 * len(b), 8):
         x = b[i // 8]  # Get the current byte
         for j in range(8):
@@ -61,18 +63,28 @@ def bytes_to_bits(b):
     return a
 
 #   Algorithm 5, ByteEncode_d(F)
-def byte_encode(d, f, q):
+#   If `out` is given, the 32*d bytes per polynomial are written into it
+#   (any writable buffer) instead of a freshly allocated bytearray.
+#   `bits` is an optional scratch bit array of at least 256*d entries.
+def byte_encode(d, f, q, out=None, bits=None):
     if isinstance(f[0], list):  # Handle list of polynomials
-        return b''.join(byte_encode(d, x, q) for x in f)
+        if out is None:
+            out = bytearray(32 * d * len(f))
+        v = memoryview(out)
+        for i, x in enumerate(f):
+            byte_encode(d, x, q, v[32 * d * i : 32 * d * (i + 1)], bits)
+        return out
 
     m = (1 << d) if d < 12 else q  # Use 2^d or q depending on d
-    b = bytearray(256 * d)  # Allocate bit array
+    b = bits if bits is not None else bytearray(256 * d)  # Allocate bit array
     for i in range(256):
         a = f[i] % m  # Get value modulo m
         for j in range(d):
             b[i * d + j] = a % 2  # Extract bits
             a //= 2
-    return bits_to_bytes(b)  # Convert bit array to bytes
+    if out is None:
+        out = bytearray(32 * d)
+    return bits_to_bytes(b, out)  # Convert bit array to bytes
 
 #   Algorithm 6, ByteDecode_d(B)
 def byte_decode(d, b, q):
@@ -86,6 +98,22 @@ def byte_decode(d, b, q):
         f.append(x % m)
     return f
 
+#   Modulus check of FIPS 203 Sec. 7.2 directly on ByteEncode_12 output.
+#   The buffer (any number of 3-byte groups, e.g. many keys back to back) is
+#   read as one big integer holding two 12-bit lanes per 24 bits. Each lane is
+#   isolated into a 24-bit slot and offset by 2^12 - q, so bit 12 of the slot
+#   is set exactly when the coefficient is >= q. Returns those bits: 0 means
+#   every coefficient is valid.
+def packed_modulus_violations(b, q):
+    n = len(b) // 3
+    x = int.from_bytes(b, 'little')
+    lane = int.from_bytes(b'\xff\x0f\x00' * n, 'little')   # Low 12 bits of every 24
+    bias = int.from_bytes(((1 << 12) - q).to_bytes(3, 'little') * n, 'little')
+    top = int.from_bytes(b'\x00\x10\x00' * n, 'little')    # Bit 12 of every 24
+    even = (x & lane) + bias
+    odd = ((x >> 12) & lane) + bias
+    return (even | odd) & top
+
 #   Algorithm 7, SampleNTT(B)
 def sample_ntt(b, q):
     xof = SHAKE128.new(b)  # Create SHAKE128 instance with seed b
@@ -158,6 +186,111 @@ def base_case_multiply(a0, a1, b0, b1, gam, q):
     c1 = (a0 * b1 + a1 * b0) % q        # Compute high part
     return [c0, c1]
 
+#   === In-place variants ===
+#   These write into preallocated polynomials (256-element lists) and scratch
+#   bit arrays instead of building new lists, for the workspace-based hot path
+#   in ML_KEM. The functions above are kept as the reference implementation.
+
+#   Algorithm 6 into `f`
+def byte_decode_into(d, b, q, f, bits):
+    m = (1 << d) if d < 12 else q
+    bits = bytes_to_bits(b, bits)
+    for i in range(256):
+        x = 0
+        for j in range(d):
+            x += bits[i * d + j] << j
+        f[i] = x % m
+    return f
+
+#   Algorithm 7 into `a`, reading whole SHAKE128 blocks (168 bytes = 56 triples)
+def sample_ntt_into(b, q, a):
+    xof = SHAKE128.new(b)
+    j = 0
+    while j < 256:
+        c = xof.read(168)
+        for k in range(0, 168, 3):
+            d1 = c[k] + 256 * (c[k + 1] % 16)
+            d2 = (c[k + 1] // 16) + 16 * c[k + 2]
+            if d1 < q and j < 256:
+                a[j] = d1
+                j += 1
+            if d2 < q and j < 256:
+                a[j] = d2
+                j += 1
+    return a
+
+#   Algorithm 8 into `f`
+def sample_poly_cbd_into(eta, b, q, f, bits):
+    bits = bytes_to_bits(b, bits)
+    for i in range(256):
+        x = 0
+        y = 0
+        for j in range(eta):
+            x += bits[2 * i * eta + j]
+            y += bits[(2 * i + 1) * eta + j]
+        f[i] = (x - y) % q
+    return f
+
+#   Algorithm 9 on `f` itself
+def ntt_inplace(f, q):
+    i = 1
+    le = 128
+    while le >= 2:
+        for st in range(0, 256, 2 * le):
+            ze = ML_KEM_ZETA_NTT[i]
+            i += 1
+            for j in range(st, st + le):
+                t = (ze * f[j + le]) % q
+                f[j + le] = (f[j] - t) % q
+                f[j] = (f[j] + t) % q
+        le //= 2
+    return f
+
+#   Algorithm 10 on `f` itself
+def ntt_inverse_inplace(f, q):
+    i = 127
+    le = 2
+    while le <= 128:
+        for st in range(0, 256, 2 * le):
+            ze = ML_KEM_ZETA_NTT[i]
+            i -= 1
+            for j in range(st, st + le):
+                t = f[j]
+                f[j] = (t + f[j + le]) % q
+                f[j + le] = (ze * (f[j + le] - t)) % q
+        le *= 2
+    for j in range(256):
+        f[j] = (f[j] * 3303) % q  # Multiply by n^{-1} mod q
+    return f
+
+#   Algorithm 11 into `h`, with Algorithm 12 inlined
+def multiply_ntts_into(f, g, q, h):
+    for i in range(0, 256, 2):
+        gam = ML_KEM_ZETA_MUL[i // 2]
+        h[i] = (f[i] * g[i] + f[i + 1] * g[i + 1] * gam) % q
+        h[i + 1] = (f[i] * g[i + 1] + f[i + 1] * g[i]) % q
+    return h
+
+#   h += f * g in the NTT domain, for dot products without a temporary product
+def multiply_ntts_add(f, g, q, h):
+    for i in range(0, 256, 2):
+        gam = ML_KEM_ZETA_MUL[i // 2]
+        h[i] = (h[i] + f[i] * g[i] + f[i + 1] * g[i + 1] * gam) % q
+        h[i + 1] = (h[i + 1] + f[i] * g[i + 1] + f[i + 1] * g[i]) % q
+    return h
+
+# f += g element-wise
+def poly_add_inplace(f, g, q):
+    for i in range(256):
+        f[i] = (f[i] + g[i]) % q
+    return f
+
+# f -= g element-wise
+def poly_sub_inplace(f, g, q):
+    for i in range(256):
+        f[i] = (f[i] - g[i]) % q
+    return f
+
 #   Helper functions
 
 # Add two polynomials element-wise
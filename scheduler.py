@@ -0,0 +1,123 @@
+import time
+
+from mlkem import ML_KEM, ML_KEM_PARAM
+
+# Operations the scheduler can batch, mapped to the ML_KEM method that runs them
+ML_KEM_OPS = {
+    "keygen": "keygen_internal",
+    "encaps": "encaps_internal",
+    "decaps": "decaps_internal",
+}
+
+class BatchScheduler:
+    """
+    Scheduler for interleaved ML-KEM-512/768/1024 traffic.
+
+    Requests are queued per class, i.e. per (parameter set, operation), and each
+    class is executed as one homogeneous batch on a dedicated ML_KEM context, so
+    no instance is ever re-initialised to switch parameter sets. A class is
+    flushed when its queue reaches its limit, or on the first `poll()` after its
+    oldest request has waited `deadline` seconds. Deadlines are not enforced on
+    their own: callers must poll at least every `deadline` seconds, or schedule
+    the next poll at `next_deadline()`. Results are returned in submission order;
+    a request that raised is returned as its exception instance, so one bad
+    request never takes down the rest of its batch.
+    """
+
+    def __init__(self, queue_limit=64, deadline=0.005, queue_limits=None, clock=time.monotonic):
+        """
+        Parameters:
+            queue_limit (int): Default maximum queued requests per class
+            deadline (float): Time in seconds after which `poll()` flushes a waiting class
+            queue_limits (dict): Per-class overrides, keyed by (param, op)
+            clock (callable): Monotonic time source
+        """
+        self.queue_limit = queue_limit
+        self.deadline = deadline
+        self.queue_limits = dict(queue_limits or {})
+        self.clock = clock
+        self.kems = {param: ML_KEM(param) for param in ML_KEM_PARAM}  # One context per parameter set
+        self.queues = {}        # (param, op) -> [(ticket, args), ...]
+        self.oldest = {}        # (param, op) -> submission time of the oldest queued request
+        self.results = {}       # ticket -> result of a completed request
+        self.next_ticket = 0
+        self.next_result = 0
+
+    def submit(self, param, op, *args):
+        """Queue `op` ("keygen", "encaps" or "decaps") for parameter set `param`. Returns its ticket."""
+        if param not in ML_KEM_PARAM or op not in ML_KEM_OPS:
+            raise ValueError(f"unknown request class: {param} {op}")
+        key = (param, op)
+        queue = self.queues.setdefault(key, [])
+        if not queue:
+            self.oldest[key] = self.clock()
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        queue.append((ticket, args))
+        if len(queue) >= self.queue_limits.get(key, self.queue_limit):
+            self.flush_class(key)  # Queue full, run the batch now
+        return ticket
+
+    def execute_batch(self, param, op, batch):
+        """
+        Run a homogeneous batch of argument tuples and return the list of results,
+        with the exception in place of the result for any request that raised.
+        This is the single dispatch point for a vectorized backend.
+        """
+        fn = getattr(self.kems[param], ML_KEM_OPS[op])
+        results = []
+        for args in batch:
+            try:
+                results.append(fn(*args))
+            except Exception as e:
+                results.append(e)  # Fail this request only
+        return results
+
+    def flush_class(self, key):
+        """Execute every queued request of one (param, op) class."""
+        queue = self.queues.pop(key, [])
+        self.oldest.pop(key, None)
+        if not queue:
+            return
+        results = self.execute_batch(key[0], key[1], [args for (_, args) in queue])
+        for (ticket, _), result in zip(queue, results):
+            self.results[ticket] = result
+
+    def poll(self):
+        """Flush every class whose oldest request has passed the deadline, then return ready results."""
+        now = self.clock()
+        for key in [key for (key, t) in self.oldest.items() if now - t >= self.deadline]:
+            self.flush_class(key)
+        return self.collect()
+
+    def next_deadline(self):
+        """Clock time at which the next class falls due for `poll()`, or None if nothing is queued."""
+        if not self.oldest:
+            return None
+        return min(self.oldest.values()) + self.deadline
+
+    def flush(self):
+        """Flush all classes regardless of deadline and return ready results."""
+        for key in list(self.queues):
+            self.flush_class(key)
+        return self.collect()
+
+    def collect(self):
+        """Return completed results in submission order, stopping at the first pending ticket."""
+        out = []
+        while self.next_result in self.results:
+            out.append(self.results.pop(self.next_result))
+            self.next_result += 1
+        return out
+
+    def pending(self):
+        """Number of submitted requests whose results have not been collected yet."""
+        return self.next_ticket - self.next_result
+
+    def run(self, requests):
+        """Schedule an iterable of (param, op, *args) tuples and return all results in submission order."""
+        out = []
+        for (param, op, *args) in requests:
+            self.submit(param, op, *args)
+            out += self.poll()
+        return out + self.flush()
@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+import time
+from loadgen import parse_mix, percentile, missed_requests, worker, async_worker, run_load
+
+class TestLoadGen(unittest.TestCase):
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("keygen=1,encaps=4, decaps=2.5"),
+                         (["keygen", "encaps", "decaps"], [1.0, 4.0, 2.5]))
+        self.assertEqual(parse_mix("decaps"), (["decaps"], [1.0]))
+        with self.assertRaises(ValueError):
+            parse_mix("encaps=1,sign=1")
+
+    def test_percentile(self):
+        values = list(range(1, 1001))
+        self.assertEqual(percentile(values, 50), 500)
+        self.assertEqual(percentile(values, 99), 990)
+        self.assertEqual(percentile(values, 99.9), 999)
+        self.assertEqual(percentile(values, 100), 1000)
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)  # Odd n: the median
+        self.assertEqual(percentile(list(range(1, 151)), 99), 149)  # Rank 148.5 rounds up
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([7], 99.9), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_missed_requests(self):
+        self.assertEqual(missed_requests(1.0, 2.0, 10), 10)
+        self.assertEqual(missed_requests(2.0, 2.0, 10), 0)
+        self.assertEqual(missed_requests(1.0, 2.0, None), 0)
+
+    def test_paced_run_honors_duration(self):
+        # Far more than one thread can serve: the run must still stop on time
+        t0 = time.perf_counter()
+        (samples, missed) = worker("ML-KEM-512", "encaps", 0.5, 1000, 0)
+        elapsed = time.perf_counter() - t0
+        self.assertLess(elapsed, 1.0)
+        self.assertGreater(missed, 0)
+        self.assertAlmostEqual(len(samples) + missed, 500, delta=5)
+
+    def test_async_paced_run_honors_duration(self):
+        t0 = time.perf_counter()
+        (samples, missed) = asyncio.run(async_worker("ML-KEM-512", "encaps", 0.5, 1000, 0))
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertAlmostEqual(len(samples) + missed, 500, delta=5)
+
+    def test_report(self):
+        report = run_load("ML-KEM-512", "encaps=1,decaps=1", "threads", 1, 0.3, None, 0.1)
+        self.assertEqual(report["missed"], 0)
+        self.assertEqual(report["ops"]["all"]["count"],
+                         sum(report["ops"][op]["count"] for op in ("encaps", "decaps") if op in report["ops"]))
+        self.assertLess(report["duration"], 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
+import mmap
 import os
+import threading
+from array import array
 from mlkem import ML_KEM
+import polynomials as poly
 import secrets
 
 class TestMLKEM_PKE(unittest.TestCase):
@@ -73,5 +77,137 @@ class TestMLKEM_PKE(unittest.TestCase):
         with self.assertRaises(Exception):
             self.kem.k_pke_encrypt(self.ek, 12345, self.randomness)
 
+class TestMLKEM_Buffers(unittest.TestCase):
+
+    def setUp(self):
+        self.kem = ML_KEM(param="ML-KEM-768")
+        self.ek, self.dk = self.kem.keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32))
+        self.m = secrets.token_bytes(32)
+        self.k, self.c = self.kem.encaps_internal(self.ek, self.m)
+
+    def anonymous_mmap(self, b):
+        mm = mmap.mmap(-1, len(b))
+        mm.write(b)
+        self.addCleanup(mm.close)
+        return mm
+
+    def test_accepts_any_buffer(self):
+        d, z = secrets.token_bytes(32), secrets.token_bytes(32)
+        keys = self.kem.keygen_internal(d, z)
+        for wrap in (bytearray, memoryview, lambda b: memoryview(bytearray(b)),
+                     self.anonymous_mmap, lambda b: array('B', b)):
+            k, c = self.kem.encaps_internal(wrap(self.ek), wrap(self.m))
+            self.assertEqual((k, c), (self.k, self.c))
+            self.assertEqual(self.kem.decaps_internal(wrap(self.dk), wrap(self.c)), self.k)
+            self.assertEqual(self.kem.keygen_internal(wrap(d), wrap(z)), keys)
+            k_out, c_out = bytearray(32), bytearray(self.kem.ct_len)
+            self.kem.encaps_internal_into(wrap(self.ek), wrap(self.m), k_out, c_out)
+            self.assertEqual((bytes(k_out), bytes(c_out)), (self.k, self.c))
+
+    def test_rejects_truncated_dk(self):
+        for use_workspace in (False, True):
+            kem = ML_KEM("ML-KEM-768", use_workspace)
+            with self.assertRaises(ValueError):
+                kem.decaps_internal(self.dk[:-32], self.c)
+            with self.assertRaises(ValueError):
+                kem.decaps_internal(self.dk + bytes(1), self.c)
+
+    def test_encaps_into_send_buffer(self):
+        buf = bytearray(8 + 32 + self.kem.ct_len)  # header || key || ciphertext
+        view = memoryview(buf)
+        self.kem.encaps_internal_into(self.ek, self.m, view[8:40], view[40:])
+        self.assertEqual(bytes(buf[8:40]), self.k)
+        self.assertEqual(bytes(buf[40:]), self.c)
+        self.assertEqual(bytes(buf[:8]), bytes(8))
+
+    def test_decaps_into(self):
+        k_out = bytearray(32)
+        self.kem.decaps_internal_into(self.dk, self.c, k_out)
+        self.assertEqual(bytes(k_out), self.k)
+
+    def test_pke_decrypt_into(self):
+        dk_pke = self.dk[0 : 384 * self.kem.k]
+        ek_pke = self.ek
+        c = self.kem.k_pke_encrypt(ek_pke, self.m, bytes(32))
+        for use_workspace in (False, True):
+            kem = ML_KEM("ML-KEM-768", use_workspace)
+            m_out = bytearray(32)
+            kem.k_pke_decrypt_into(dk_pke, c, m_out)
+            self.assertEqual(bytes(m_out), self.m)
+            for size in (31, 33):
+                with self.assertRaises(ValueError):
+                    kem.k_pke_decrypt_into(dk_pke, c, bytearray(size))
+            with self.assertRaises(ValueError):
+                kem.k_pke_decrypt_into(dk_pke, c, bytes(32))
+
+    def test_into_rejects_bad_output_buffer(self):
+        with self.assertRaises(ValueError):
+            self.kem.decaps_internal_into(self.dk, self.c, bytearray(31))
+        with self.assertRaises(ValueError):
+            self.kem.encaps_internal_into(self.ek, self.m, bytearray(32), bytes(self.kem.ct_len))
+
+class TestMLKEM_Workspace(unittest.TestCase):
+
+    def setUp(self):
+        self.q = 3329
+        self.f = [secrets.randbelow(self.q) for _ in range(256)]
+        self.g = [secrets.randbelow(self.q) for _ in range(256)]
+
+    def test_inplace_primitives_match_reference(self):
+        q, f, g = self.q, self.f, self.g
+        self.assertEqual(poly.ntt_inplace(list(f), q), poly.ntt(f, q))
+        self.assertEqual(poly.ntt_inverse_inplace(list(f), q), poly.ntt_inverse(f, q))
+        self.assertEqual(poly.multiply_ntts_into(f, g, q, [0] * 256), poly.multiply_ntts(f, g, q))
+        self.assertEqual(poly.multiply_ntts_add(f, g, q, list(g)), poly.poly_add(g, poly.multiply_ntts(f, g, q), q))
+        self.assertEqual(poly.poly_add_inplace(list(f), g, q), poly.poly_add(f, g, q))
+        self.assertEqual(poly.poly_sub_inplace(list(f), g, q), poly.poly_sub(f, g, q))
+        bits = bytearray(256 * 12)
+        for d in (1, 4, 10, 11, 12):
+            b = secrets.token_bytes(32 * d)
+            self.assertEqual(poly.byte_decode_into(d, b, q, [0] * 256, bits), poly.byte_decode(d, b, q))
+        seed = secrets.token_bytes(34)
+        self.assertEqual(poly.sample_ntt_into(seed, q, [0] * 256), poly.sample_ntt(seed, q))
+        for eta in (2, 3):
+            b = secrets.token_bytes(64 * eta)
+            self.assertEqual(poly.sample_poly_cbd_into(eta, b, q, [0] * 256, bits), poly.sample_poly_cbd(eta, b, q))
+
+    def test_workspace_matches_list_path(self):
+        for param in ("ML-KEM-512", "ML-KEM-768", "ML-KEM-1024"):
+            ref, fast = ML_KEM(param, use_workspace=False), ML_KEM(param)
+            ek, dk = ref.keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32))
+            m = secrets.token_bytes(32)
+            k, c = ref.encaps_internal(ek, m)
+            self.assertEqual(fast.encaps_internal(ek, m), (k, c))
+            self.assertEqual(fast.decaps_internal(dk, c), k)
+            bad = bytearray(c)
+            bad[-1] ^= 1
+            self.assertEqual(fast.decaps_internal(dk, bad), ref.decaps_internal(dk, bad))
+
+    def test_workspace_is_per_thread(self):
+        kem = ML_KEM("ML-KEM-512")
+        ek, dk = kem.keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32))
+        k, c = kem.encaps_internal(ek, secrets.token_bytes(32))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(kem.decaps_internal(dk, c))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [k] * 4)
+        other = []
+        t = threading.Thread(target=lambda: other.append(kem.workspace()))
+        t.start()
+        t.join()
+        self.assertIs(kem.workspace(), kem.workspace())
+        self.assertIsNot(other[0], kem.workspace())
+
+    def test_workspace_follows_parameter_switch(self):
+        kem = ML_KEM("ML-KEM-512")
+        ek, dk = ML_KEM("ML-KEM-1024").keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32))
+        m = secrets.token_bytes(32)
+        k, c = kem.encaps_internal(ek, m, "ML-KEM-1024")
+        self.assertEqual(len(c), kem.ct_len)
+        self.assertEqual(kem.decaps_internal(dk, c), k)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import secrets
+from mlkem import ML_KEM
+from scheduler import BatchScheduler
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestBatchScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sched = BatchScheduler(queue_limit=4, deadline=0.01, clock=self.clock)
+        self.seeds = {p: (secrets.token_bytes(32), secrets.token_bytes(32))
+                      for p in ("ML-KEM-512", "ML-KEM-768", "ML-KEM-1024")}
+
+    def test_mixed_results_in_submission_order(self):
+        requests = []
+        for p, (d, z) in self.seeds.items():
+            requests.append((p, "keygen", d, z))
+        for p, (d, z) in self.seeds.items():
+            requests.append((p, "encaps", ML_KEM(p).keygen_internal(d, z)[0], d))
+        results = self.sched.run(requests)
+        self.assertEqual(len(results), len(requests))
+        for (p, op, *args), result in zip(requests, results):
+            self.assertEqual(result, getattr(ML_KEM(p), op + "_internal")(*args))
+
+    def test_encaps_decaps_roundtrip(self):
+        p = "ML-KEM-768"
+        ek, dk = ML_KEM(p).keygen_internal(*self.seeds[p])
+        (k, c), = self.sched.run([(p, "encaps", ek, secrets.token_bytes(32))])
+        self.assertEqual(self.sched.run([(p, "decaps", dk, c)]), [k])
+
+    def test_queue_limit_flushes_class(self):
+        d, z = self.seeds["ML-KEM-512"]
+        for _ in range(3):
+            self.sched.submit("ML-KEM-512", "keygen", d, z)
+        self.assertEqual(self.sched.poll(), [])
+        self.sched.submit("ML-KEM-512", "keygen", d, z)
+        self.assertEqual(len(self.sched.collect()), 4)
+
+    def test_per_class_queue_limit(self):
+        sched = BatchScheduler(queue_limit=100, queue_limits={("ML-KEM-1024", "keygen"): 1}, clock=self.clock)
+        sched.submit("ML-KEM-1024", "keygen", *self.seeds["ML-KEM-1024"])
+        self.assertEqual(len(sched.collect()), 1)
+
+    def test_deadline_flush(self):
+        self.assertIsNone(self.sched.next_deadline())
+        self.sched.submit("ML-KEM-512", "keygen", *self.seeds["ML-KEM-512"])
+        self.clock.now += 0.004
+        self.sched.submit("ML-KEM-768", "keygen", *self.seeds["ML-KEM-768"])
+        self.assertEqual(self.sched.next_deadline(), 0.01)  # Oldest class first
+        self.assertEqual(self.sched.poll(), [])
+        self.clock.now = self.sched.next_deadline()
+        self.assertEqual(len(self.sched.poll()), 1)
+        self.assertAlmostEqual(self.sched.next_deadline(), 0.014)
+        self.clock.now += 0.01
+        self.assertEqual(len(self.sched.poll()), 1)
+        self.assertEqual(self.sched.pending(), 0)
+        self.assertIsNone(self.sched.next_deadline())
+
+    def test_order_held_behind_pending_request(self):
+        self.sched.submit("ML-KEM-512", "keygen", *self.seeds["ML-KEM-512"])
+        self.clock.now += 0.005
+        self.sched.submit("ML-KEM-768", "keygen", *self.seeds["ML-KEM-768"])
+        self.sched.flush_class(("ML-KEM-768", "keygen"))
+        self.assertEqual(self.sched.collect(), [])  # First ticket still queued
+        self.assertEqual(len(self.sched.flush()), 2)
+
+    def test_bad_request_does_not_break_batch(self):
+        p = "ML-KEM-768"
+        ek, _ = ML_KEM(p).keygen_internal(*self.seeds[p])
+        m = secrets.token_bytes(32)
+        sched = BatchScheduler(queue_limit=2, clock=self.clock)
+        sched.submit(p, "encaps", ek[:-1], m)       # Truncated key
+        sched.submit(p, "encaps", ek, m)            # Fills the queue, must not raise
+        (bad, good) = sched.collect()
+        self.assertIsInstance(bad, ValueError)
+        self.assertEqual(good, ML_KEM(p).encaps_internal(ek, m))
+        sched.submit(p, "keygen", *self.seeds[p])
+        self.assertEqual(len(sched.flush()), 1)
+        self.assertEqual(sched.pending(), 0)
+
+    def test_unknown_class(self):
+        with self.assertRaises(ValueError):
+            self.sched.submit("ML-KEM-256", "keygen", b"", b"")
+        with self.assertRaises(ValueError):
+            self.sched.submit("ML-KEM-512", "sign", b"")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import secrets
+from array import array
+from mlkem import ML_KEM
+from polynomials import byte_decode, byte_encode, packed_modulus_violations
+from validation import check_ek_batch, check_dk_batch, ExpandedKeyCache
+
+class TestMLKEM_Validation(unittest.TestCase):
+
+    def setUp(self):
+        self.kem = ML_KEM(param="ML-KEM-512")
+        self.keys = [self.kem.keygen_internal(secrets.token_bytes(32), secrets.token_bytes(32)) for _ in range(4)]
+        self.eks = [ek for (ek, _) in self.keys]
+        self.dks = [dk for (_, dk) in self.keys]
+
+    def corrupt_ek(self, ek, i, value):
+        """Overwrite coefficient i of t[0] with a 12-bit `value`, bypassing the mod q reduction."""
+        b = bytearray(ek)
+        g = 3 * (i // 2)
+        x = int.from_bytes(b[g : g + 3], 'little')
+        shift = 12 * (i % 2)
+        x = (x & ~(0xFFF << shift)) | (value << shift)
+        b[g : g + 3] = x.to_bytes(3, 'little')
+        return bytes(b)
+
+    def test_packed_check_matches_round_trip(self):
+        for _ in range(20):
+            b = secrets.token_bytes(384)
+            naive = byte_encode(12, byte_decode(12, b, self.kem.q), self.kem.q) == b
+            self.assertEqual(packed_modulus_violations(b, self.kem.q) == 0, naive)
+
+    def test_boundary_coefficients(self):
+        for i in (0, 1, 255):
+            self.assertTrue(self.kem.ek_check(self.corrupt_ek(self.eks[0], i, self.kem.q - 1)))
+            self.assertFalse(self.kem.ek_check(self.corrupt_ek(self.eks[0], i, self.kem.q)))
+            self.assertFalse(self.kem.ek_check(self.corrupt_ek(self.eks[0], i, 0xFFF)))
+
+    def test_ek_batch_flags_bad_keys(self):
+        eks = list(self.eks)
+        eks[1] = self.corrupt_ek(eks[1], 77, 4000)
+        eks[2] = eks[2][:-1]
+        self.assertEqual(check_ek_batch(self.kem, eks), [True, False, False, True])
+        self.assertEqual(check_ek_batch(self.kem, map(memoryview, self.eks)), [True] * 4)
+
+    def test_dk_batch_hash_check(self):
+        dks = list(self.dks)
+        bad = bytearray(dks[3])
+        bad[384 * self.kem.k] ^= 1  # Flip a bit of the embedded ek
+        dks[3] = bad
+        self.assertEqual(check_dk_batch(self.kem, dks), [True, True, True, False])
+
+    def test_cache_encaps_matches_reference(self):
+        cache = ExpandedKeyCache("ML-KEM-512", max_keys=2)
+        self.assertEqual(cache.ingest(self.eks[:3]), [True] * 3)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(self.eks[0], cache)
+        m = secrets.token_bytes(32)
+        for ek in self.eks:
+            self.assertEqual(cache.encaps(ek, m), self.kem.encaps_internal(ek, m))
+        (t, a, _) = cache.get(self.eks[0])
+        self.assertEqual({type(f) for f in t + [f for row in a for f in row]}, {array})
+        cache.kem.use_workspace = False  # List-based path must accept the packed arrays too
+        self.assertEqual(cache.encaps(self.eks[0], m), self.kem.encaps_internal(self.eks[0], m))
+
+    def test_cache_rejects_invalid_key(self):
+        cache = ExpandedKeyCache("ML-KEM-512")
+        with self.assertRaises(ValueError):
+            cache.encaps(self.corrupt_ek(self.eks[0], 3, self.kem.q), secrets.token_bytes(32))
+
+if __name__ == "__main__":
+    unittest.main()
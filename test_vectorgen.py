@@ -0,0 +1,74 @@
+import unittest
+import os
+import tempfile
+import vectorgen
+from mlkem import ML_KEM
+from test_mlkem import mlkem_load_keygen, mlkem_load_encdec
+
+class TestVectorGen(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = [vectorgen.derive_case(b"\x01", i) for i in range(3)]
+
+    def test_cases_are_deterministic(self):
+        self.assertEqual(vectorgen.derive_case(b"\x01", 2), self.cases[2])
+        self.assertNotEqual(vectorgen.derive_case(b"\x02", 2), self.cases[2])
+
+    def test_backends_agree_with_reference(self):
+        (_, first) = vectorgen.check_cases(self.cases, list(vectorgen.BACKENDS))
+        self.assertIsNone(first)
+
+    def test_divergence_is_reported_and_minimized(self):
+        def broken(cases):
+            return [out[:3] + (bytes(32),) + out[4:] for out in vectorgen.run_reference(cases)]
+        vectorgen.BACKENDS["broken"] = broken
+        try:
+            (_, first) = vectorgen.check_cases(self.cases, ["broken"])
+            (x, backend, field) = first
+            self.assertEqual((x["index"], backend, field), (0, "broken", "k"))
+            repro = vectorgen.reproducer(vectorgen.minimize(x, backend), backend)
+            self.assertEqual(repro["param"], "ML-KEM-512")
+            self.assertEqual(repro["m"], "00" * 32)
+        finally:
+            del vectorgen.BACKENDS["broken"]
+
+    def test_backend_exception_is_a_divergence(self):
+        def crashing(cases):
+            if any(x["index"] == 1 for x in cases):
+                raise IndexError("backend crashed")
+            return vectorgen.run_reference(cases)
+        vectorgen.BACKENDS["crashing"] = crashing
+        try:
+            (_, first) = vectorgen.check_cases(self.cases, ["crashing"])
+            (x, backend, field) = first
+            self.assertEqual((x["index"], backend, field), (1, "crashing", "exception"))
+            repro = vectorgen.reproducer(vectorgen.minimize(x, backend), backend)
+            self.assertEqual(repro["field"], "exception")
+            self.assertEqual(repro["got"], repr(IndexError("backend crashed")))
+            self.assertEqual(repro["expected"], "None")
+        finally:
+            del vectorgen.BACKENDS["crashing"]
+
+    def test_acvp_output_loads(self):
+        (ref, _) = vectorgen.check_cases(self.cases, [])
+        with tempfile.TemporaryDirectory() as path:
+            vectorgen.write_acvp(path, self.cases, ref)
+            kg = os.path.join(path, "ML-KEM-keyGen-FIPS203")
+            ed = os.path.join(path, "ML-KEM-encapDecap-FIPS203")
+            keygen_kat = mlkem_load_keygen(os.path.join(kg, "prompt.json"), os.path.join(kg, "expectedResults.json"))
+            (encaps_kat, decaps_kat) = mlkem_load_encdec(os.path.join(ed, "prompt.json"),
+                                                         os.path.join(ed, "expectedResults.json"))
+        self.assertEqual((len(keygen_kat), len(encaps_kat), len(decaps_kat)), (3, 3, 6))
+        for x in decaps_kat:
+            kem = ML_KEM(x["parameterSet"])
+            self.assertEqual(kem.decaps_internal(bytes.fromhex(x["dk"]), bytes.fromhex(x["c"])).hex().upper(), x["k"])
+
+    def test_run_writes_only_write_count_cases(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.assertIsNone(vectorgen.run(b"\x01", 5, [], jobs=1, chunk=2, out=path, write_count=3, progress=False))
+            kg = os.path.join(path, "ML-KEM-keyGen-FIPS203")
+            keygen_kat = mlkem_load_keygen(os.path.join(kg, "prompt.json"), os.path.join(kg, "expectedResults.json"))
+        self.assertEqual(len(keygen_kat), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+from array import array
+from collections import OrderedDict
+
+from polynomials import packed_modulus_violations
+from mlkem import ML_KEM
+
+#   Section 7.2 encapsulation key checks for a batch of keys
+def check_ek_batch(kem, eks):
+    """
+    Run the type and modulus checks on many encapsulation keys at once.
+
+    The 12-bit coefficient parts of all correctly sized keys are checked
+    together as a single packed buffer, so the cost is a handful of big-integer
+    operations rather than a decode/encode round trip per key.
+    Returns a list of booleans, one per key.
+    """
+    size = 384 * kem.k
+    eks = [kem.byte_view(ek) for ek in eks]
+    ok = [len(ek) == kem.ek_len for ek in eks]
+    packed = b''.join(ek[0:size] for (ek, good) in zip(eks, ok) if good)
+    viol = packed_modulus_violations(packed, kem.q)
+    if viol:
+        # Only locate the offending keys when the batch as a whole fails
+        viol = viol.to_bytes(len(packed), 'little')
+        zero = bytes(size)
+        pos = 0
+        for i in range(len(eks)):
+            if ok[i]:
+                ok[i] = viol[pos : pos + size] == zero
+                pos += size
+    return ok
+
+#   Section 7.3 decapsulation key checks for a batch of keys
+def check_dk_batch(kem, dks):
+    """Run the type and hash checks on many decapsulation keys. Returns a list of booleans."""
+    return [kem.dk_check(dk) for dk in dks]
+
+class ExpandedKeyCache:
+    """
+    LRU cache of validated encapsulation keys in expanded form (t, A^T, H(ek)),
+    so repeated encapsulations to the same peer skip decoding, matrix sampling
+    and hashing of the key.
+
+    Polynomials are stored as array('H') (2 bytes per coefficient), so an entry
+    costs about (k + k^2) * 0.6 KiB plus the key itself: roughly 4 KiB for
+    ML-KEM-512 and 12.5 KiB for ML-KEM-1024, i.e. about 12.5 MiB at the
+    default `max_keys` of 1024.
+    """
+
+    def __init__(self, param='ML-KEM-1024', max_keys=1024):
+        self.kem = ML_KEM(param)
+        self.max_keys = max_keys
+        self.keys = OrderedDict()  # bytes(ek) -> (t, A^T, H(ek))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, ek):
+        return bytes(ek) in self.keys
+
+    def ingest(self, eks):
+        """Validate a batch of keys, cache the valid ones and return the list of check results."""
+        eks = list(eks)
+        ok = check_ek_batch(self.kem, eks)
+        for (ek, good) in zip(eks, ok):
+            if good:
+                self.put(ek)
+        return ok
+
+    def put(self, ek):
+        """Expand and cache a key that has already passed `ek_check`."""
+        ek = bytes(ek)
+        if ek in self.keys:
+            self.keys.move_to_end(ek)
+            return self.keys[ek]
+        (t, a) = self.kem.expand_ek(ek)
+        t = [array('H', f) for f in t]
+        a = [[array('H', f) for f in row] for row in a]
+        entry = (t, a, self.kem.h(ek))
+        self.keys[ek] = entry
+        if len(self.keys) > self.max_keys:
+            self.keys.popitem(last=False)  # Evict least recently used key
+        return entry
+
+    def get(self, ek):
+        """Return the cached expansion of `ek`, validating and caching it on a miss."""
+        entry = self.keys.get(bytes(ek))
+        if entry is not None:
+            self.keys.move_to_end(bytes(ek))
+            return entry
+        if not self.kem.ek_check(ek):
+            raise ValueError("Encapsulation key check failed")
+        return self.put(ek)
+
+    #   Algorithm 17 on a cached key
+    def encaps_into(self, ek, m, k_out, c_out):
+        """Encapsulate to `ek`, writing the shared key into `k_out` and the ciphertext into `c_out`."""
+        (t, a, h) = self.get(ek)
+        k_out = self.kem.out_view(k_out, 32)
+        (k, r) = self.kem.g(m, h)
+        self.kem.k_pke_encrypt_into(ek, m, r, c_out, expanded=(t, a))
+        k_out[:] = k
+        return (k_out, c_out)
+
+    def encaps(self, ek, m):
+        """Encapsulate to `ek` using the cached expansion. Returns (shared key, ciphertext)."""
+        k = bytearray(32)
+        c = bytearray(self.kem.ct_len)
+        self.encaps_into(ek, m, k, c)
+        return (bytes(k), bytes(c))
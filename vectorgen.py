@@ -0,0 +1,334 @@
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from Crypto.Hash import SHAKE256
+
+from mlkem import ML_KEM, ML_KEM_PARAM
+from scheduler import BatchScheduler
+from validation import ExpandedKeyCache
+
+PARAMS = list(ML_KEM_PARAM)
+FIELDS = ("ek", "dk", "c", "k", "k_dec", "k_rej")
+WRITE_COUNT = 1000  # Default number of cases written with --out; all of them are held in memory
+
+#   === Deterministic cases ===
+
+def derive_case(seed, index):
+    """
+    Case `index` of master `seed`: parameter set, d, z, m and the ciphertext
+    byte to corrupt for the implicit-rejection check, all read from
+    SHAKE256(seed || index) so any case can be regenerated on its own.
+    """
+    xof = SHAKE256.new(seed)
+    xof.update(index.to_bytes(8, 'little'))
+    b = xof.read(101)
+    return {
+        "index": index,
+        "param": PARAMS[b[96] % len(PARAMS)],
+        "d": b[0:32], "z": b[32:64], "m": b[64:96],
+        "flip": int.from_bytes(b[97:101], 'little'),
+    }
+
+def tamper(c, flip):
+    """Copy of ciphertext `c` with one bit flipped at a position chosen by `flip`."""
+    c = bytearray(c)
+    c[flip % len(c)] ^= 1 << (flip >> 29)
+    return bytes(c)
+
+#   === Backends: each maps a list of cases to a list of output tuples (FIELDS) ===
+
+KEMS = {}
+
+def kem_for(param, use_workspace=True):
+    if (param, use_workspace) not in KEMS:
+        KEMS[(param, use_workspace)] = ML_KEM(param, use_workspace)
+    return KEMS[(param, use_workspace)]
+
+def run_reference(cases, use_workspace=False):
+    """Straight FIPS 203 path over the list-based polynomials.py primitives."""
+    out = []
+    for x in cases:
+        kem = kem_for(x["param"], use_workspace)
+        (ek, dk) = kem.keygen_internal(x["d"], x["z"])
+        (k, c) = kem.encaps_internal(ek, x["m"])
+        out.append((ek, dk, c, k, kem.decaps_internal(dk, c), kem.decaps_internal(dk, tamper(c, x["flip"]))))
+    return out
+
+def run_inplace(cases):
+    """Same calls as the reference, on the in-place workspace primitives."""
+    return run_reference(cases, use_workspace=True)
+
+def run_buffers(cases):
+    """Memoryview inputs and the *_into variants writing into one shared buffer."""
+    out = []
+    for x in cases:
+        kem = kem_for(x["param"])
+        (ek, dk) = kem.keygen_internal(memoryview(x["d"]), bytearray(x["z"]))
+        buf = memoryview(bytearray(96 + kem.ct_len))  # k || k_dec || k_rej || c
+        kem.encaps_internal_into(memoryview(ek), bytearray(x["m"]), buf[0:32], buf[96:])
+        c = bytes(buf[96:])
+        kem.decaps_internal_into(bytearray(dk), buf[96:], buf[32:64])
+        kem.decaps_internal_into(memoryview(dk), tamper(c, x["flip"]), buf[64:96])
+        out.append((ek, dk, c, bytes(buf[0:32]), bytes(buf[32:64]), bytes(buf[64:96])))
+    return out
+
+def run_cache(cases):
+    """Encapsulation through ExpandedKeyCache (batched key checks, cached t and A^T)."""
+    keys = [kem_for(x["param"]).keygen_internal(x["d"], x["z"]) for x in cases]
+    caches = {param: ExpandedKeyCache(param, max_keys=len(cases)) for param in PARAMS}
+    for param in PARAMS:
+        caches[param].ingest(ek for (x, (ek, _)) in zip(cases, keys) if x["param"] == param)
+    out = []
+    for (x, (ek, dk)) in zip(cases, keys):
+        kem = kem_for(x["param"])
+        (k, c) = caches[x["param"]].encaps(ek, x["m"])
+        out.append((ek, dk, c, k, kem.decaps_internal(dk, c), kem.decaps_internal(dk, tamper(c, x["flip"]))))
+    return out
+
+def run_scheduler(cases):
+    """Mixed parameter-set batches through BatchScheduler."""
+    sched = BatchScheduler(queue_limit=max(1, len(cases) // 4))
+    keys = sched.run([(x["param"], "keygen", x["d"], x["z"]) for x in cases])
+    encs = sched.run([(x["param"], "encaps", ek, x["m"]) for (x, (ek, _)) in zip(cases, keys)])
+    decs = sched.run([req for (x, (_, dk), (_, c)) in zip(cases, keys, encs)
+                      for req in ((x["param"], "decaps", dk, c),
+                                  (x["param"], "decaps", dk, tamper(c, x["flip"])))])
+    return [(ek, dk, c, k, decs[2*i], decs[2*i + 1])
+            for (i, ((ek, dk), (k, c))) in enumerate(zip(keys, encs))]
+
+BACKENDS = {
+    "inplace": run_inplace,
+    "buffers": run_buffers,
+    "cache": run_cache,
+    "scheduler": run_scheduler,
+}
+
+#   === Differential check ===
+
+def run_guarded(backend, cases):
+    """
+    Run a backend over `cases`. If it raises, rerun it case by case so every
+    failing case yields its exception in place of an output tuple.
+    """
+    try:
+        return backend(cases)
+    except Exception:
+        out = []
+        for x in cases:
+            try:
+                out.append(backend([x])[0])
+            except Exception as e:
+                out.append(e)
+        return out
+
+def first_exception(out):
+    """The exception raised for a case (whole output or any single field), or None."""
+    if isinstance(out, Exception):
+        return out
+    for value in out:
+        if isinstance(value, Exception):
+            return value
+    return None
+
+def compare(ref, got):
+    """Return the first field where two outputs differ ("exception" if only one side raised), or None."""
+    (ref_exc, got_exc) = (first_exception(ref), first_exception(got))
+    if ref_exc is not None or got_exc is not None:
+        return None if repr(ref_exc) == repr(got_exc) else "exception"
+    for (field, a, b) in zip(FIELDS, ref, got):
+        if bytes(a) != bytes(b):
+            return field
+    return None
+
+def check_cases(cases, backends):
+    """Run `cases` through the reference and every backend. Returns (reference outputs, first divergence or None)."""
+    ref = run_guarded(run_reference, cases)
+    first = None
+    for name in backends:
+        got = run_guarded(BACKENDS[name], cases)
+        for (x, r, g) in zip(cases, ref, got):
+            field = compare(r, g)
+            if field is not None and (first is None or x["index"] < first[0]["index"]):
+                first = (x, name, field)
+                break
+    return (ref, first)
+
+def check_chunk(args):
+    """Pool worker: check cases [start, start + count) of `seed`."""
+    (seed, start, count, backends, keep) = args
+    cases = [derive_case(seed, i) for i in range(start, start + count)]
+    (ref, first) = check_cases(cases, backends)
+    return (count, cases if keep else None, ref if keep else None, first)
+
+def diverges(x, backend):
+    return compare(run_guarded(run_reference, [x])[0], run_guarded(BACKENDS[backend], [x])[0]) is not None
+
+def minimize(x, backend):
+    """
+    Shrink a diverging case while it keeps diverging: try the smallest parameter
+    set, then zero whole inputs, then individual bytes, then the flip position.
+    """
+    x = dict(x)
+    for param in PARAMS[:PARAMS.index(x["param"])]:
+        if diverges(dict(x, param=param), backend):
+            x["param"] = param
+            break
+    for name in ("d", "z", "m"):
+        if diverges(dict(x, **{name: bytes(32)}), backend):
+            x[name] = bytes(32)
+            continue
+        for i in range(32):
+            if x[name][i]:
+                y = bytearray(x[name])
+                y[i] = 0
+                if diverges(dict(x, **{name: bytes(y)}), backend):
+                    x[name] = bytes(y)
+    if diverges(dict(x, flip=0), backend):
+        x["flip"] = 0
+    return x
+
+def reproducer(x, backend):
+    """JSON-ready description of a diverging case with both outputs (or exception reprs)."""
+    ref = run_guarded(run_reference, [x])[0]
+    got = run_guarded(BACKENDS[backend], [x])[0]
+    field = compare(ref, got)
+    if field == "exception":
+        (expected, got) = (repr(first_exception(ref)), repr(first_exception(got)))
+    else:
+        i = FIELDS.index(field)
+        (expected, got) = (bytes(ref[i]).hex().upper(), bytes(got[i]).hex().upper())
+    return {
+        "backend": backend, "param": x["param"], "index": x["index"],
+        "d": x["d"].hex().upper(), "z": x["z"].hex().upper(), "m": x["m"].hex().upper(),
+        "flip": x["flip"], "field": field, "expected": expected, "got": got,
+    }
+
+#   === ACVP JSON output ===
+
+def acvp_header(mode):
+    return {"vsId": 0, "algorithm": "ML-KEM", "mode": mode, "revision": "FIPS203", "isSample": True}
+
+def write_acvp(path, cases, outputs):
+    """Write keyGen and encapDecap prompt.json / expectedResults.json in the json-copy/ layout."""
+    keygen_req, keygen_res = acvp_header("keyGen"), acvp_header("keyGen")
+    encdec_req, encdec_res = acvp_header("encapDecap"), acvp_header("encapDecap")
+    keygen_req["testGroups"], keygen_res["testGroups"] = [], []
+    encdec_req["testGroups"], encdec_res["testGroups"] = [], []
+    hx = lambda b: bytes(b).hex().upper()
+
+    tcid = 0
+    for (tgid, param) in enumerate(PARAMS, 1):
+        group = [(x, r) for (x, r) in zip(cases, outputs) if x["param"] == param]
+        qt, rt = [], []
+        for (x, (ek, dk, c, k, k_dec, k_rej)) in group:
+            tcid += 1
+            qt.append({"tcId": tcid, "z": hx(x["z"]), "d": hx(x["d"])})
+            rt.append({"tcId": tcid, "ek": hx(ek), "dk": hx(dk)})
+        keygen_req["testGroups"].append({"tgId": tgid, "testType": "AFT", "parameterSet": param, "tests": qt})
+        keygen_res["testGroups"].append({"tgId": tgid, "tests": rt})
+
+    (tgid, tcid) = (0, 0)
+    for param in PARAMS:
+        group = [(x, r) for (x, r) in zip(cases, outputs) if x["param"] == param]
+        tgid += 1
+        qt, rt = [], []
+        for (x, (ek, dk, c, k, k_dec, k_rej)) in group:
+            tcid += 1
+            qt.append({"tcId": tcid, "ek": hx(ek), "m": hx(x["m"])})
+            rt.append({"tcId": tcid, "c": hx(c), "k": hx(k)})
+        encdec_req["testGroups"].append({"tgId": tgid, "testType": "AFT", "parameterSet": param,
+                                         "function": "encapsulation", "tests": qt})
+        encdec_res["testGroups"].append({"tgId": tgid, "tests": rt})
+    for param in PARAMS:
+        # One decapsulation group per key: the valid ciphertext and its corrupted copy
+        for (x, (ek, dk, c, k, k_dec, k_rej)) in ((x, r) for (x, r) in zip(cases, outputs) if x["param"] == param):
+            tgid += 1
+            qt, rt = [], []
+            for (ct, kk) in ((c, k_dec), (tamper(c, x["flip"]), k_rej)):
+                tcid += 1
+                qt.append({"tcId": tcid, "c": hx(ct)})
+                rt.append({"tcId": tcid, "k": hx(kk)})
+            encdec_req["testGroups"].append({"tgId": tgid, "testType": "VAL", "parameterSet": param,
+                                             "function": "decapsulation", "dk": hx(dk), "tests": qt})
+            encdec_res["testGroups"].append({"tgId": tgid, "tests": rt})
+
+    for (sub, req, res) in (("ML-KEM-keyGen-FIPS203", keygen_req, keygen_res),
+                            ("ML-KEM-encapDecap-FIPS203", encdec_req, encdec_res)):
+        os.makedirs(os.path.join(path, sub), exist_ok=True)
+        for (fn, doc) in (("prompt.json", req), ("expectedResults.json", res)):
+            with open(os.path.join(path, sub, fn), "w") as f:
+                json.dump(doc, f, indent=2)
+
+#   === Driver ===
+
+def run(seed, count, backends, jobs=None, chunk=64, out=None, write_count=0, progress=True):
+    """
+    Check `count` cases of `seed` in parallel chunks, stopping at the first chunk
+    that diverges. Returns a minimized reproducer dict, or None if all cases agree.
+    The first `write_count` cases are written as ACVP vectors to `out`.
+    """
+    tasks = [(seed, start, min(chunk, count - start), backends, start < write_count)
+             for start in range(0, count, chunk)]
+    keep_cases, keep_ref = [], []
+    done = 0
+    t0 = time.perf_counter()
+    with Pool(jobs) as pool:
+        for (n, cases, ref, first) in pool.imap(check_chunk, tasks):
+            if first is not None:
+                pool.terminate()
+                (x, backend, field) = first
+                return reproducer(minimize(x, backend), backend)
+            if cases is not None:
+                for (x, r) in zip(cases, ref):
+                    if len(keep_cases) >= write_count:
+                        break
+                    if first_exception(r) is None:  # Only write cases the reference completed
+                        keep_cases.append(x)
+                        keep_ref.append(r)
+            done += n
+            if progress:
+                rate = done / (time.perf_counter() - t0)
+                print(f"\r{done}/{count} cases agree ({rate:.1f}/s)", end="", file=sys.stderr)
+    if progress:
+        print(file=sys.stderr)
+    if out and write_count:
+        write_acvp(out, keep_cases, keep_ref)
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate seeded ML-KEM cases and check every optimized backend against the reference path.")
+    parser.add_argument("--seed", default="00", help="master seed as hex")
+    parser.add_argument("--count", type=int, default=1000, help="number of cases")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="comma-separated subset of: " + ", ".join(BACKENDS))
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=64, help="cases per work unit")
+    parser.add_argument("--out", help="directory for ACVP JSON vectors")
+    parser.add_argument("--write-count", type=int, default=None,
+                        help=f"number of cases to write as vectors with --out (default: {WRITE_COUNT}); "
+                             "they are kept in memory until the run ends")
+    args = parser.parse_args(argv)
+
+    backends = [b for b in args.backends.split(",") if b]
+    for b in backends:
+        if b not in BACKENDS:
+            parser.error(f"unknown backend: {b}")
+    write_count = 0
+    if args.out:
+        write_count = min(args.count, WRITE_COUNT) if args.write_count is None else args.write_count
+
+    repro = run(bytes.fromhex(args.seed), args.count, backends, args.jobs, args.chunk, args.out, write_count)
+    if repro is not None:
+        print("DIVERGENCE (minimized reproducer):")
+        print(json.dumps(repro, indent=2))
+        return 1
+    print(f"All {args.count} cases agree across reference, {', '.join(backends)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())